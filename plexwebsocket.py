@@ -1,12 +1,38 @@
 """Support for issuing callbacks for Plex client updates via websockets."""
 import asyncio
-from datetime import datetime
+import json
 import logging
+import sys
 
 import aiohttp
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+
+    # Reused across messages so simdjson can recycle its internal buffers.
+    _PARSER = simdjson.Parser()
+except ImportError:
+    simdjson = None
+
+# Bound once; frame data is fed to the loader directly rather than through
+# the WSMessage.json() indirection.
+_loads = orjson.loads if orjson else json.loads
+
 _LOGGER = logging.getLogger(__name__)
 
+# Hoisted so the message loop compares against locals instead of chasing
+# aiohttp.WSMsgType attributes on every frame.
+_WS_TEXT = aiohttp.WSMsgType.TEXT
+_WS_CLOSE = aiohttp.WSMsgType.CLOSE
+_WS_CLOSING = aiohttp.WSMsgType.CLOSING
+_WS_CLOSED = aiohttp.WSMsgType.CLOSED
+_WS_ERROR = aiohttp.WSMsgType.ERROR
+
 SIGNAL_CONNECTION_STATE = "plexwebsocket_state"
 
 ERROR_AUTH_FAILURE = "Authorization failure"
@@ -15,30 +41,43 @@ ERROR_UNKNOWN = "Unknown"
 
 MAX_FAILED_ATTEMPTS = 5
 
+# Seconds to wait after an event before firing callbacks, allowing a burst
+# of updates to coalesce into a single notification.
+CALLBACK_COALESCE_WINDOW = 0.05
+
 STATE_CONNECTED = "connected"
 STATE_DISCONNECTED = "disconnected"
 STATE_STARTING = "starting"
 STATE_STOPPED = "stopped"
 
+# Interned copies of the player states Plex emits; comparing interned
+# strings with `is` is a single pointer check per message.
+_BUFFERING = sys.intern("buffering")
+_PLAYING = sys.intern("playing")
+_STOPPED = sys.intern("stopped")
+
 
 class WebsocketPlayer:  # pylint: disable=too-few-public-methods
     """Represent an individual player state in the Plex websocket stream."""
 
-    def __init__(self, session_id, state, media_key, position):
+    __slots__ = ("session_id", "state", "media_key", "position", "timestamp")
+
+    def __init__(self, session_id, state, media_key, position, timestamp):
         """Initialize a WebsocketPlayer instance."""
         self.session_id = session_id
         self.state = state
         self.media_key = media_key
         self.position = position
-        self.timestamp = datetime.now()
+        self.timestamp = timestamp
 
     def significant_position_change(self, timestamp, new_position):
         """Determine if position change indicates a seek."""
-        timediff = (timestamp - self.timestamp).total_seconds()
-        posdiff = (new_position - self.position) / 1000
-        diffdiff = timediff - posdiff
+        # viewOffset is integer milliseconds; compare in ms to avoid a
+        # float division per message.
+        timediff_ms = int((timestamp - self.timestamp) * 1000)
+        posdiff_ms = new_position - self.position
 
-        if abs(diffdiff) > 5:
+        if abs(timediff_ms - posdiff_ms) > 5000:
             return True
         return False
 
@@ -74,15 +113,43 @@ class PlexWebsocket:
                 Provide an optional session object.
 
         """
-        self.session = session or aiohttp.ClientSession()
+        self._ssl = False if verify_ssl is False else None
+        if session:
+            self.session = session
+        else:
+            # Cache DNS and keep idle connections alive so reconnects can
+            # skip re-resolution and, where possible, the TCP/TLS handshake.
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=4,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60,
+                    ssl=False if verify_ssl is False else True,
+                )
+            )
         self.uri = self._get_uri(plex_server)
         self.players = {}
         self.callback = callback
         self.subscriptions = subscriptions
-        self._ssl = False if verify_ssl is False else None
+        self._subscriptions = frozenset(subscriptions)
+        self._handlers = {"playing": self._handle_playing}
+        # Cheap substring prefilter so frames for unsubscribed notification
+        # types are dropped without a JSON parse; both compact and spaced
+        # envelope encodings are matched. The post-parse check stays
+        # authoritative in case a marker appears inside a payload value.
+        self._type_markers = [
+            marker
+            for subscription in subscriptions
+            for marker in (
+                f'"type":"{subscription}"',
+                f'"type": "{subscription}"',
+            )
+        ]
         self._state = None
         self.failed_attempts = 0
         self._error_reason = None
+        self._pending = {}
+        self._flush_handle = None
 
     @property
     def state(self):
@@ -109,38 +176,103 @@ class PlexWebsocket:
         self.state = STATE_STARTING
 
         try:
+            # Plex frames are small LAN JSON: skip permessage-deflate
+            # negotiation and the per-frame size check.
             async with self.session.ws_connect(
-                self.uri, heartbeat=15, ssl=self._ssl
+                self.uri,
+                heartbeat=15,
+                ssl=self._ssl,
+                compress=0,
+                max_msg_size=0,
+                autoping=True,
             ) as ws_client:
                 self.state = STATE_CONNECTED
                 self.failed_attempts = 0
 
-                async for message in ws_client:
-                    if self.state == STATE_STOPPED:
-                        break
-
-                    if message.type == aiohttp.WSMsgType.TEXT:
-                        msg = message.json()["NotificationContainer"]
-                        msgtype = msg["type"]
-
-                        if msgtype not in self.subscriptions:
-                            _LOGGER.debug("Ignoring: %s", msg)
-                            continue
-
-                        if msgtype == "playing":
-                            if self.player_event(msg):
-                                self.callback(msgtype, msg, None)
+                # Pre-bind hot references; LOAD_FAST beats repeated
+                # attribute lookups in the receive loop.
+                receive = ws_client.receive
+                # pylint: disable-next=protected-access
+                buffered = ws_client._reader._buffer
+                type_markers = self._type_markers
+                subscriptions = self._subscriptions
+                get_handler = self._handlers.get
+                passthrough = self._handle_passthrough
+                schedule_flush = self._schedule_flush
+
+                while self.state != STATE_STOPPED:
+                    batch = [await receive()]
+
+                    # Drain frames aiohttp has already buffered so a burst
+                    # of notifications costs one scheduler wakeup instead
+                    # of one per frame. Only data frames are drained:
+                    # receive() consumes buffered ping/pong internally and
+                    # would then block with the batch still undelivered.
+                    while buffered and buffered[0][0].type is _WS_TEXT:
+                        batch.append(await receive())
+
+                    closed = False
+                    player_updates = {}
+
+                    for message in batch:
+                        msgtype_ws = message.type
+                        if msgtype_ws is _WS_TEXT:
+                            data = message.data
+                            if not any(
+                                marker in data for marker in type_markers
+                            ):
+                                continue
+
+                            if simdjson:
+                                # Lazy parse: only the keys actually read
+                                # are converted to Python objects. The
+                                # proxy must not survive this iteration or
+                                # simdjson refuses to reuse the parser on
+                                # the next frame.
+                                proxy = _PARSER.parse(data)[
+                                    "NotificationContainer"
+                                ]
+                                msgtype = sys.intern(proxy["type"])
+                                msg = (
+                                    proxy.as_dict()
+                                    if msgtype in subscriptions
+                                    else None
+                                )
+                                del proxy
                             else:
-                                _LOGGER.debug("Ignoring player update: %s", msg)
-                        else:
-                            self.callback(msgtype, msg, None)
-
-                    elif message.type == aiohttp.WSMsgType.CLOSED:
-                        _LOGGER.warning("AIOHTTP websocket connection closed")
-                        break
-
-                    elif message.type == aiohttp.WSMsgType.ERROR:
-                        _LOGGER.error("AIOHTTP websocket error")
+                                msg = _loads(data)["NotificationContainer"]
+                                msgtype = sys.intern(msg["type"])
+                                if msgtype not in subscriptions:
+                                    msg = None
+
+                            if msg is None:
+                                _LOGGER.debug("Ignoring: %s", msgtype)
+                                continue
+
+                            get_handler(msgtype, passthrough)(
+                                msgtype, msg, player_updates
+                            )
+
+                        elif msgtype_ws is _WS_CLOSED:
+                            _LOGGER.warning(
+                                "AIOHTTP websocket connection closed"
+                            )
+                            closed = True
+                            break
+
+                        elif msgtype_ws is _WS_ERROR:
+                            _LOGGER.error("AIOHTTP websocket error")
+                            closed = True
+                            break
+
+                        elif msgtype_ws is _WS_CLOSE or msgtype_ws is _WS_CLOSING:
+                            closed = True
+                            break
+
+                    for session_id, msg in player_updates.items():
+                        schedule_flush((_PLAYING, session_id), _PLAYING, msg)
+
+                    if closed:
                         break
 
         except aiohttp.ClientResponseError as error:
@@ -156,7 +288,11 @@ class PlexWebsocket:
                 self._error_reason = ERROR_TOO_MANY_RETRIES
                 self.state = STATE_STOPPED
             elif self.state != STATE_STOPPED:
-                retry_delay = min(2 ** (self.failed_attempts - 1) * 30, 300)
+                retry_delay = (
+                    min(30 << (self.failed_attempts - 1), 300)
+                    if self.failed_attempts
+                    else 15
+                )
                 self.failed_attempts += 1
                 _LOGGER.error(
                     "Websocket connection failed, retrying in %ds: %s",
@@ -180,45 +316,49 @@ class PlexWebsocket:
 
     def player_event(self, msg):
         """Determine if messages relate to an interesting player event."""
-        should_fire = False
-
         payload = msg["PlaySessionStateNotification"][0]
-        _LOGGER.debug("Payload received: %s", payload)
+        # Checked once per message so no LogRecords are built on the hot
+        # path when debug logging is off.
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        if debug:
+            _LOGGER.debug("Payload received: %s", payload)
 
         if (session_id := payload.get("sessionKey")) is None:
             return False
-        state = payload["state"]
+        state = sys.intern(payload["state"])
         media_key = payload["key"]
         position = payload["viewOffset"]
+        now = asyncio.get_running_loop().time()
 
-        if session_id not in self.players:
+        player = self.players.get(session_id)
+        if player is None:
             self.players[session_id] = WebsocketPlayer(
-                session_id, state, media_key, position
+                session_id, state, media_key, position, now
             )
-            _LOGGER.debug("New session: %s", payload)
+            if debug:
+                _LOGGER.debug("New session: %s", payload)
             return True
 
-        if state == "stopped":
+        if state is _STOPPED:
             # Sessions "end" when stopped
-            self.players.pop(session_id)
-            _LOGGER.debug("Session ended: %s", payload)
+            self.players.pop(session_id, None)
+            if debug:
+                _LOGGER.debug("Session ended: %s", payload)
             return True
 
-        player = self.players[session_id]
-        now = datetime.now()
-
-        # Ignore buffering states as transient
-        if state != "buffering":
-            if player.media_key != media_key or player.state != state:
-                # State or playback item changed
-                _LOGGER.debug("State/media changed: %s", payload)
-                should_fire = True
-            elif state == "playing" and player.significant_position_change(
-                now, position
-            ):
-                # Client continues to play and a seek was detected
-                _LOGGER.debug("Seek detected: %s", payload)
-                should_fire = True
+        changed = player.media_key != media_key or player.state != state
+
+        # Fire when the state or playback item changed, or when a seek was
+        # detected while playback continues; buffering states are transient.
+        should_fire = state is not _BUFFERING and (
+            changed
+            or (
+                state is _PLAYING
+                and player.significant_position_change(now, position)
+            )
+        )
+        if should_fire and debug:
+            _LOGGER.debug("Significant update: %s", payload)
 
         player.state = state
         player.media_key = media_key
@@ -227,6 +367,36 @@ class PlexWebsocket:
 
         return should_fire
 
+    def _handle_playing(self, msgtype, msg, player_updates):
+        """Stage a qualifying player update for batch delivery."""
+        if self.player_event(msg):
+            session_id = msg["PlaySessionStateNotification"][0]["sessionKey"]
+            # Only the newest update per session survives the batch
+            player_updates[session_id] = msg
+        elif _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Ignoring player update: %s", msg)
+
+    def _handle_passthrough(self, msgtype, msg, player_updates):
+        """Queue a subscribed non-player message for delivery."""
+        # Non-player payloads never supersede each other, so each gets a
+        # unique key: deferred by the coalesce window, never dropped.
+        self._schedule_flush(object(), msgtype, msg)
+
+    def _schedule_flush(self, key, msgtype, msg):
+        """Queue a callback and arm the trailing-edge flush timer."""
+        self._pending[key] = (msgtype, msg)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                CALLBACK_COALESCE_WINDOW, self._flush
+            )
+
+    def _flush(self):
+        """Fire one callback per coalesced event."""
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        for msgtype, msg in pending.values():
+            self.callback(msgtype, msg, None)
+
     async def listen(self):
         """Close the listening websocket."""
         self.failed_attempts = 0
@@ -235,4 +405,8 @@ class PlexWebsocket:
 
     def close(self):
         """Close the listening websocket."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending.clear()
         self.state = STATE_STOPPED
@@ -18,6 +18,7 @@ setup(
     platforms='any',
     py_modules=['plexwebsocket'],
     install_requires=['aiohttp'],
+    extras_require={'fast-json': ['orjson', 'pysimdjson']},
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
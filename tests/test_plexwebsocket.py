@@ -0,0 +1,94 @@
+"""Regression tests for the plexwebsocket message loop."""
+import asyncio
+import json
+
+from aiohttp import web
+
+from plexwebsocket import PlexWebsocket
+
+HOST = "127.0.0.1"
+PORT = 8098
+
+
+def playing_msg(session_key="1", state="playing", view_offset=0):
+    """Build a 'playing' notification frame."""
+    return {
+        "NotificationContainer": {
+            "type": "playing",
+            "PlaySessionStateNotification": [
+                {
+                    "sessionKey": session_key,
+                    "state": state,
+                    "key": "/library/metadata/1",
+                    "viewOffset": view_offset,
+                }
+            ],
+        }
+    }
+
+
+class FakeServer:  # pylint: disable=too-few-public-methods
+    """Provide the url() interface of plexapi.server.PlexServer."""
+
+    @staticmethod
+    def url(path, includeToken=True):  # pylint: disable=unused-argument
+        """Return a URI pointing at the local test server."""
+        return f"http://{HOST}:{PORT}{path}"
+
+
+async def run_session(frames, subscriptions):
+    """Serve the given frames over a local websocket and collect callbacks."""
+    received = []
+
+    async def handler(request):
+        ws_server = web.WebSocketResponse()
+        await ws_server.prepare(request)
+        for frame in frames:
+            await ws_server.send_str(json.dumps(frame))
+        await asyncio.sleep(0.3)
+        await ws_server.close()
+        return ws_server
+
+    app = web.Application()
+    app.router.add_get("/:/websockets/notifications", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, HOST, PORT)
+    await site.start()
+
+    websocket = PlexWebsocket(
+        FakeServer(), lambda *args: received.append(args), subscriptions
+    )
+    task = asyncio.create_task(websocket.listen())
+    await asyncio.sleep(1.0)
+    websocket.close()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await websocket.session.close()
+    await runner.cleanup()
+    return received
+
+
+def test_unsubscribed_frame_then_subscribed_frame():
+    """An ignored notification must not break handling of the next one.
+
+    The unsubscribed frame nests a subscribed type marker as a payload
+    value so it passes the raw-text prefilter and exercises the parser
+    on the ignore path.
+    """
+    frames = [
+        {
+            "NotificationContainer": {
+                "type": "activity",
+                "Activity": [{"type": "playing"}],
+            }
+        },
+        playing_msg(),
+    ]
+    received = asyncio.run(run_session(frames, ["playing"]))
+    msgtypes = [msgtype for msgtype, _, _ in received]
+    assert "playing" in msgtypes
+    assert "activity" not in msgtypes